@@ -3,27 +3,48 @@ Vercel serverless function for generating minimalist wallpapers.
 Returns a PNG image based on goals.json configuration.
 """
 
+import hashlib
 import json
 import sys
+from collections import OrderedDict
 from io import BytesIO
 from pathlib import Path
 from http.server import BaseHTTPRequestHandler
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from PIL import Image
+
 from lib.wallpaper import generate_wallpaper
 
 
 # Load goals configuration
 GOALS_PATH = Path(__file__).parent.parent / 'goals.json'
 
+# PNG ignores `quality`; deflate dominates encode time, so favour speed here.
+# Palette images give deflate a third of the data, so a mid level stays cheap.
+PNG_COMPRESS_LEVEL = 3
+
+# The flat design needs few colours; 128 leaves room for text antialiasing
+PNG_PALETTE_COLORS = 128
+
+# Encoded PNGs keyed by goals config; globals survive warm invocations
+PNG_CACHE_SIZE = 8
+_png_cache = OrderedDict()
+
 
 def load_goals():
     """Load goals from configuration file."""
     try:
-        with open(GOALS_PATH, 'r') as f:
-            return json.load(f)
+        with open(GOALS_PATH, 'rb') as f:
+            return _loads(f.read())
     except FileNotFoundError:
         # Return default goals if file not found
         return {
@@ -37,6 +58,69 @@ def load_goals():
         }
 
 
+# goals.json is immutable for the container's lifetime, so read it once.
+# A malformed file must not break the import; do_GET retries and reports it.
+try:
+    _DEFAULT_GOALS = load_goals()
+except Exception:
+    _DEFAULT_GOALS = None
+
+
+def default_goals() -> dict:
+    """Return a copy of the base goals config safe to modify per request."""
+    goals_config = _DEFAULT_GOALS if _DEFAULT_GOALS is not None else load_goals()
+    return dict(goals_config)
+
+
+def encode_png(img) -> bytes:
+    """Encode an image as a palette PNG for the response body."""
+    img = img.quantize(
+        colors=PNG_PALETTE_COLORS,
+        method=Image.Quantize.FASTOCTREE,
+        dither=Image.Dither.NONE,
+    )
+    buffer = BytesIO()
+    img.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+    # getvalue() hands back the internal buffer without another copy
+    return buffer.getvalue()
+
+
+def render_png(goals_config: dict) -> tuple:
+    """Generate and encode a wallpaper, reusing cached bytes when possible.
+
+    Returns the PNG bytes and a strong ETag derived from them.
+    """
+    key = json.dumps(goals_config, sort_keys=True)
+    cached = _png_cache.get(key)
+    if cached is not None:
+        _png_cache.move_to_end(key)
+        return cached
+
+    image_data = encode_png(generate_wallpaper(goals_config))
+    etag = '"%s"' % hashlib.blake2b(image_data, digest_size=16).hexdigest()
+    _png_cache[key] = (image_data, etag)
+    if len(_png_cache) > PNG_CACHE_SIZE:
+        _png_cache.popitem(last=False)
+    return image_data, etag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # Weak comparison, as RFC 9110 specifies for If-None-Match
+    return '*' in candidates or etag in (tag.removeprefix('W/') for tag in candidates)
+
+
+# Render the default wallpaper during cold start so plain GETs do no PIL work.
+# A failure here must not break the import; do_GET retries and reports it.
+try:
+    _DEFAULT_PNG = render_png(default_goals())
+except Exception:
+    _DEFAULT_PNG = None
+
+
 class handler(BaseHTTPRequestHandler):
     """Vercel serverless function handler."""
 
@@ -47,32 +131,43 @@ class handler(BaseHTTPRequestHandler):
             from urllib.parse import urlparse, parse_qs
             query = parse_qs(urlparse(self.path).query)
 
-            # Load base goals config
-            goals_config = load_goals()
-
             # Allow resolution override via query params
+            goals_config = None
             if 'width' in query and 'height' in query:
                 try:
                     width = int(query['width'][0])
                     height = int(query['height'][0])
-                    goals_config['resolution'] = [width, height]
                 except (ValueError, IndexError):
                     pass
+                else:
+                    # Copy the base config so overrides don't leak into later requests
+                    goals_config = default_goals()
+                    goals_config['resolution'] = [width, height]
 
-            # Generate wallpaper
-            img = generate_wallpaper(goals_config)
-
-            # Convert to bytes
-            buffer = BytesIO()
-            img.save(buffer, format='PNG', quality=95)
-            buffer.seek(0)
-            image_data = buffer.getvalue()
+            if goals_config is not None:
+                # Generate wallpaper (or reuse a cached render)
+                image_data, etag = render_png(goals_config)
+            elif _DEFAULT_PNG is not None:
+                # Serve the wallpaper pre-rendered at import
+                image_data, etag = _DEFAULT_PNG
+            else:
+                # Pre-render failed at import; retry so the error becomes a 500
+                image_data, etag = render_png(default_goals())
+
+            # Client already has this image
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'public, max-age=300')
+                self.end_headers()
+                return
 
             # Send response
             self.send_response(200)
             self.send_header('Content-Type', 'image/png')
             self.send_header('Content-Length', len(image_data))
             self.send_header('Cache-Control', 'public, max-age=300')  # Cache for 5 minutes
+            self.send_header('ETag', etag)
             self.end_headers()
             self.wfile.write(image_data)
 
@@ -92,7 +187,7 @@ class handler(BaseHTTPRequestHandler):
             body = self.rfile.read(content_length)
 
             # Parse JSON body as goals config
-            goals_config = json.loads(body.decode('utf-8'))
+            goals_config = _loads(body)
 
             # Ensure required fields
             if 'resolution' not in goals_config:
@@ -102,19 +197,14 @@ class handler(BaseHTTPRequestHandler):
             if 'title' not in goals_config:
                 goals_config['title'] = 'GOALS'
 
-            # Generate wallpaper
-            img = generate_wallpaper(goals_config)
-
-            # Convert to bytes
-            buffer = BytesIO()
-            img.save(buffer, format='PNG', quality=95)
-            buffer.seek(0)
-            image_data = buffer.getvalue()
+            # Generate wallpaper (or reuse a cached render)
+            image_data, etag = render_png(goals_config)
 
             # Send response
             self.send_response(200)
             self.send_header('Content-Type', 'image/png')
             self.send_header('Content-Length', len(image_data))
+            self.send_header('ETag', etag)
             self.end_headers()
             self.wfile.write(image_data)
 
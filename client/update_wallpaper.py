@@ -4,37 +4,81 @@ Local client script to fetch wallpaper from Vercel API (or generate locally)
 and set it as the desktop wallpaper.
 
 Usage:
-    python update_wallpaper.py [--local] [--api URL]
+    python update_wallpaper.py [--local] [--api URL] [--resolutions WxH,...]
 
 Options:
-    --local     Generate wallpaper locally instead of fetching from API
-    --api URL   Custom API URL (default: uses local generation)
+    --local         Generate wallpaper locally instead of fetching from API
+    --api URL       Custom API URL (default: uses local generation)
+    --resolutions   Render several resolutions in parallel (local generation only)
 """
 
 import argparse
+import json
 import os
 import platform
+import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Default paths
 DEFAULT_WALLPAPER_PATH = Path.home() / '.local' / 'share' / 'wallpapers' / 'goals_wallpaper.png'
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# Seconds to wait when connecting to / reading from the API
+FETCH_TIMEOUT = 10
+
 
 def fetch_from_api(api_url: str, output_path: Path) -> bool:
     """Fetch wallpaper from Vercel API."""
     try:
+        import urllib.error
         import urllib.request
         print(f"Fetching wallpaper from {api_url}...")
 
         # Create directory if needed
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Fetch image
-        urllib.request.urlretrieve(api_url, output_path)
+        # Ask the API to skip the body if our copy is still current
+        etag_path = output_path.with_suffix('.etag')
+        request = urllib.request.Request(api_url)
+        if output_path.exists() and etag_path.exists():
+            request.add_header('If-None-Match', etag_path.read_text().strip())
+
+        try:
+            response = urllib.request.urlopen(request, timeout=FETCH_TIMEOUT)
+        except urllib.error.HTTPError as e:
+            e.close()
+            if e.code != 304:
+                raise
+            print(f"Wallpaper unchanged, keeping {output_path}")
+            return True
+
+        # Stream into a temp file beside the target, then swap it in atomically
+        with response, tempfile.NamedTemporaryFile(dir=output_path.parent, delete=False) as tmp:
+            try:
+                shutil.copyfileobj(response, tmp, length=64 * 1024)
+                tmp.close()
+
+                # Temp files are created 0600; use the mode a normal write would get
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp.name, 0o666 & ~umask)
+
+                os.replace(tmp.name, output_path)
+            except BaseException:
+                tmp.close()
+                Path(tmp.name).unlink(missing_ok=True)
+                raise
+
+        etag = response.headers.get('ETag')
+        if etag:
+            etag_path.write_text(etag)
+        else:
+            etag_path.unlink(missing_ok=True)
+
         print(f"Wallpaper saved to {output_path}")
         return True
 
@@ -43,8 +87,40 @@ def fetch_from_api(api_url: str, output_path: Path) -> bool:
         return False
 
 
-def generate_locally(output_path: Path) -> bool:
-    """Generate wallpaper locally using the lib modules."""
+def parse_resolutions(value: str) -> list:
+    """Parse a comma-separated list of resolutions like '1920x1080,2560x1440'."""
+    resolutions = []
+    for item in value.split(','):
+        try:
+            width, height = (int(part) for part in item.strip().lower().split('x'))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid resolution: {item!r}")
+        if width <= 0 or height <= 0:
+            raise argparse.ArgumentTypeError(f"Resolution must be positive: {item!r}")
+        resolutions.append((width, height))
+    return resolutions
+
+
+def render_resolution(resolution: tuple, output_path: str) -> str:
+    """Render goals.json at one resolution (also used as a pool worker)."""
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    from lib.wallpaper import generate_wallpaper
+
+    with open(PROJECT_ROOT / 'goals.json', 'r') as f:
+        goals_config = json.load(f)
+
+    goals_config['resolution'] = list(resolution)
+    generate_wallpaper(goals_config, output_path)
+    return output_path
+
+
+def generate_locally(output_path: Path, resolutions: list = None) -> bool:
+    """Generate wallpaper locally using the lib modules.
+
+    With several resolutions, the first is written to output_path and the
+    rest next to it as <name>_<width>x<height>.png, rendered in parallel.
+    """
     try:
         # Add project root to path
         sys.path.insert(0, str(PROJECT_ROOT))
@@ -54,8 +130,30 @@ def generate_locally(output_path: Path) -> bool:
         # Create directory if needed
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
+        # The API's ETag no longer describes the file we're about to write
+        output_path.with_suffix('.etag').unlink(missing_ok=True)
+
         print("Generating wallpaper locally...")
-        generate(str(output_path))
+        if not resolutions:
+            generate(str(output_path))
+            return True
+
+        # A single render doesn't justify spawning a pool
+        if len(resolutions) == 1:
+            render_resolution(resolutions[0], str(output_path))
+            print(f"Wallpaper generated: {output_path}")
+            return True
+
+        paths = [str(output_path)] + [
+            str(output_path.with_name(f'{output_path.stem}_{w}x{h}{output_path.suffix}'))
+            for w, h in resolutions[1:]
+        ]
+
+        # Rendering is CPU-bound, so use processes rather than threads
+        workers = min(len(resolutions), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path in pool.map(render_resolution, resolutions, paths):
+                print(f"Wallpaper generated: {path}")
         return True
 
     except Exception as e:
@@ -162,33 +260,47 @@ def set_wallpaper_macos(image_path: Path) -> bool:
         return False
 
 
+def convert_to_bmp(image_path: Path) -> Path:
+    """Convert to BMP, reusing a previous conversion of identical content."""
+    import hashlib
+    from PIL import Image
+
+    digest = hashlib.blake2b(image_path.read_bytes(), digest_size=8).hexdigest()
+    bmp_path = image_path.with_name(f'{image_path.stem}_{digest}.bmp')
+
+    if not bmp_path.exists():
+        # Drop our own conversions of older wallpapers, never other BMPs
+        for stale in image_path.parent.glob(f'{image_path.stem}_' + '[0-9a-f]' * 16 + '.bmp'):
+            stale.unlink(missing_ok=True)
+        Image.open(image_path).save(bmp_path, 'BMP')
+
+    return bmp_path
+
+
 def set_wallpaper_windows(image_path: Path) -> bool:
     """Set wallpaper on Windows."""
     import ctypes
 
-    image_path = str(image_path.absolute())
-
-    # Convert PNG to BMP if needed (Windows sometimes prefers BMP)
-    try:
-        from PIL import Image
-        img = Image.open(image_path)
-        bmp_path = image_path.replace('.png', '.bmp')
-        img.save(bmp_path, 'BMP')
-        image_path = bmp_path
-    except:
-        pass
+    image_path = image_path.absolute()
 
     SPI_SETDESKWALLPAPER = 20
     SPIF_UPDATEINIFILE = 1
     SPIF_SENDCHANGE = 2
 
-    try:
-        ctypes.windll.user32.SystemParametersInfoW(
-            SPI_SETDESKWALLPAPER, 0, image_path,
+    def apply(path: Path) -> bool:
+        return bool(ctypes.windll.user32.SystemParametersInfoW(
+            SPI_SETDESKWALLPAPER, 0, str(path),
             SPIF_UPDATEINIFILE | SPIF_SENDCHANGE
-        )
-        print("Wallpaper set successfully")
-        return True
+        ))
+
+    try:
+        # Windows 7+ accepts PNG directly; older versions only take BMP
+        if apply(image_path) or apply(convert_to_bmp(image_path)):
+            print("Wallpaper set successfully")
+            return True
+
+        print("Error setting wallpaper: SystemParametersInfoW failed")
+        return False
     except Exception as e:
         print(f"Error setting wallpaper: {e}")
         return False
@@ -229,6 +341,11 @@ def main():
         '--no-set', action='store_true',
         help='Generate/fetch wallpaper but do not set it'
     )
+    parser.add_argument(
+        '--resolutions', type=parse_resolutions, default=None,
+        help='Comma-separated resolutions to render locally (e.g., 1920x1080,2560x1440); '
+             'the first is set as the wallpaper. Ignored when fetching from --api'
+    )
 
     args = parser.parse_args()
 
@@ -243,13 +360,15 @@ def main():
 
     if args.local or args.api is None:
         # Generate locally
-        success = generate_locally(output_path)
+        success = generate_locally(output_path, args.resolutions)
     else:
         # Fetch from API
         success = fetch_from_api(args.api, output_path)
+        if success and args.resolutions:
+            print("Note: --resolutions only applies to local generation; ignored")
         if not success:
             print("API fetch failed, falling back to local generation...")
-            success = generate_locally(output_path)
+            success = generate_locally(output_path, args.resolutions)
 
     if not success:
         print("Failed to generate wallpaper")
@@ -1,5 +1,6 @@
 
 import json
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 from pathlib import Path
 
@@ -15,8 +16,9 @@ COLORS = {
 }
 
 
+@lru_cache(maxsize=32)
 def get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
-    """Get a modern, clean font."""
+    """Get a modern, clean font (cached, so each TTF is parsed once per size)."""
     font_paths = [
         '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf' if bold else '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
         '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
@@ -32,9 +34,10 @@ def get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
     return ImageFont.load_default()
 
 
-def draw_title(img: Image.Image, title: str, y: int = 60) -> Image.Image:
+def draw_title(img: Image.Image, title: str, y: int = 60,
+               draw: ImageDraw.ImageDraw = None) -> Image.Image:
     """Draw a minimalist title."""
-    draw = ImageDraw.Draw(img)
+    draw = draw or ImageDraw.Draw(img)
     width = img.size[0]
     font = get_font(48, bold=True)
 
@@ -54,9 +57,10 @@ def draw_title(img: Image.Image, title: str, y: int = 60) -> Image.Image:
 
 
 def draw_progress_bar(img: Image.Image, x: int, y: int, width: int, height: int,
-                        progress: float, bar_color: tuple) -> Image.Image:
+                        progress: float, bar_color: tuple,
+                        draw: ImageDraw.ImageDraw = None) -> Image.Image:
     """Draw a minimalist progress bar."""
-    draw = ImageDraw.Draw(img)
+    draw = draw or ImageDraw.Draw(img)
     progress_width = int(width * min(progress, 1.0))
 
     # Background
@@ -70,9 +74,9 @@ def draw_progress_bar(img: Image.Image, x: int, y: int, width: int, height: int,
 
 
 def draw_goal(img: Image.Image, goal: dict, x: int, y: int,
-              width: int, index: int) -> Image.Image:
+              width: int, index: int, draw: ImageDraw.ImageDraw = None) -> Image.Image:
     """Draw a single goal with a minimalist progress bar."""
-    draw = ImageDraw.Draw(img)
+    draw = draw or ImageDraw.Draw(img)
 
     # Color for this goal
     color = COLORS['primary']
@@ -94,7 +98,7 @@ def draw_goal(img: Image.Image, goal: dict, x: int, y: int,
     bar_y = y + 40
     bar_height = 8
     bar_width = width - 70
-    img = draw_progress_bar(img, x, bar_y, bar_width, bar_height, progress, color)
+    img = draw_progress_bar(img, x, bar_y, bar_width, bar_height, progress, color, draw=draw)
 
     # Percentage
     percent_text = f"{int(progress * 100)}%"
@@ -117,9 +121,12 @@ def generate_wallpaper(goals_config: dict, output_path: str = None) -> Image.Ima
 
     img = Image.new('RGB', (width, height), COLORS['background'])
 
+    # One drawing context shared by every element
+    draw = ImageDraw.Draw(img)
+
     # Draw title
     title = goals_config.get('title', 'MY GOALS')
-    img = draw_title(img, title, y=80)
+    img = draw_title(img, title, y=80, draw=draw)
 
     # Draw goals
     goals = goals_config.get('goals', [])
@@ -131,11 +138,11 @@ def generate_wallpaper(goals_config: dict, output_path: str = None) -> Image.Ima
     for i, goal in enumerate(goals):
         y = goal_start_y + i * goal_height
         if y + goal_height < height:
-            img = draw_goal(img, goal, goal_x, y, goal_width, i)
+            img = draw_goal(img, goal, goal_x, y, goal_width, i, draw=draw)
 
     # Save if path provided
     if output_path:
-        img.save(output_path, 'PNG', quality=95)
+        img.save(output_path, 'PNG', compress_level=6)
 
     return img
 